@@ -1,48 +1,13 @@
-# wbgt_bot.py
+# Alternative entrypoint: replies with the full station listing directly
+# instead of offering a station keyboard.
 import os
+import asyncio
 import datetime
-import requests
-from collections import defaultdict
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
+from telegram.request import HTTPXRequest
 
-# --- WBGT functions ---
-def fetch_wbgt(date_input):
-    url = "https://api-open.data.gov.sg/v2/real-time/api/weather"
-    params = {"api": "wbgt", "date": date_input}
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        raise RuntimeError(f"Error fetching data: HTTP {response.status_code}")
-    return response.json()
-
-def format_wbgt_by_station_split(data):
-    records = data.get("data", {}).get("records", [])
-    if not records:
-        return ["No records found."]
-
-    station_data = defaultdict(list)
-    for record in records:
-        dt = record.get("datetime")
-        readings = record.get("item", {}).get("readings", [])
-        for rd in readings:
-            station = rd.get("station", {})
-            town = station.get("townCenter", station.get("name", station.get("id")))
-            wbgt = rd.get("wbgt")
-            heat_stress = rd.get("heatStress")
-            station_data[town].append((dt, wbgt, heat_stress))
-
-    messages = []
-    for station in sorted(station_data.keys()):
-        lines = [f"Station: {station}"]
-        readings_sorted = sorted(
-            station_data[station],
-            key=lambda x: datetime.datetime.fromisoformat(x[0].replace("Z", "+00:00"))
-        )
-        for dt, wbgt, heat_stress in readings_sorted:
-            lines.append(f"  {dt}  WBGT: {wbgt}  HeatStress: {heat_stress}")
-        messages.append("\n".join(lines))
-
-    return messages
+from wbgt_core import DATE_RE, fetch_wbgt, format_wbgt_by_station_split, pack_messages, close_http
 
 # --- Telegram bot handlers ---
 BOT_TOKEN = os.environ.get("BOT_TOKEN")  # Use Render environment variable
@@ -57,11 +22,15 @@ async def handle_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
     date_input = update.message.text.strip()
 
     # Validate date
+    # Cheap structural check first so spam never reaches the datetime parser;
+    # fromisoformat then rejects well-shaped but impossible dates (month 13).
+    if not DATE_RE.fullmatch(date_input):
+        await update.message.reply_text(
+            "Invalid date format. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS"
+        )
+        return
     try:
-        if "T" in date_input:
-            datetime.datetime.fromisoformat(date_input)
-        else:
-            datetime.datetime.strptime(date_input, "%Y-%m-%d")
+        datetime.datetime.fromisoformat(date_input)
     except ValueError:
         await update.message.reply_text(
             "Invalid date format. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS"
@@ -69,16 +38,27 @@ async def handle_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     try:
-        data = fetch_wbgt(date_input)
-        messages = format_wbgt_by_station_split(data)
-        for msg in messages:
+        data = await fetch_wbgt(date_input)
+        # Formatting is pure-Python CPU over hundreds of records; run it in a
+        # worker thread so the event loop keeps serving other users.
+        messages = await asyncio.to_thread(format_wbgt_by_station_split, data)
+        for msg in pack_messages(messages):
             await update.message.reply_text(msg)
     except Exception as e:
         await update.message.reply_text(f"Error fetching WBGT data: {e}")
 
 # --- Main function ---
 def main():
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    # Separate pools so long-polling getUpdates can't starve outbound sends
+    # ("All connections in the connection pool are occupied") under burst load.
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .request(HTTPXRequest(connection_pool_size=32, pool_timeout=10.0))
+        .get_updates_request(HTTPXRequest(connection_pool_size=4, pool_timeout=10.0))
+        .post_shutdown(close_http)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_date))
@@ -87,4 +67,4 @@ def main():
     app.run_polling()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
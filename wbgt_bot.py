@@ -1,59 +1,21 @@
 import os
+import asyncio
 import datetime
-import requests
-from collections import defaultdict
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters, CallbackQueryHandler
-from flask import Flask
-import threading
-
-# --- WBGT functions ---
-def fetch_wbgt(date_input):
-    url = "https://api-open.data.gov.sg/v2/real-time/api/weather"
-    params = {"api": "wbgt", "date": date_input}
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
-
-def group_wbgt_by_station(data):
-    """Return dict: {station_name: [(datetime, wbgt, heat_stress), ...]}"""
-    records = data.get("data", {}).get("records", [])
-    station_data = defaultdict(list)
-    for record in records:
-        dt = record.get("datetime")
-        readings = record.get("item", {}).get("readings", [])
-        for rd in readings:
-            station = rd.get("station", {})
-            town = station.get("townCenter", station.get("name", station.get("id")))
-            wbgt = rd.get("wbgt")
-            heat_stress = rd.get("heatStress")
-            station_data[town].append((dt, wbgt, heat_stress))
-    return station_data
-
-def format_station_data(station, readings):
-    lines = [f"Station: {station}"]
-    readings_sorted = sorted(
-        readings,
-        key=lambda x: datetime.datetime.fromisoformat(x[0].replace("Z", "+00:00"))
-    )
-    for dt_str, wbgt, heat_stress in readings_sorted:
-        # Parse the datetime string
-        dt = datetime.datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-
-        # Format date and time
-        date_str = dt.strftime("%d %b %Y")   # e.g. 20 Sep 2025
-        time_str = dt.strftime("%H%M")       # e.g. 1215
+from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters, CallbackQueryHandler, PicklePersistence
+from telegram.request import HTTPXRequest
 
-        # Add to output
-        lines.append(f" Date: {date_str} Time: {time_str}  WBGT: {wbgt}  HeatStress: {heat_stress}")
-
-    return "\n".join(lines)
+from wbgt_core import DATE_RE, fetch_wbgt, group_wbgt_by_station, format_station_data, close_http
 
 # --- Telegram bot handlers ---
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN environment variable not set!")
 
+# Grouped station data older than this is evicted from bot_data.
+_STATE_TTL = 24 * 3600
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
         "Hi! Send me a date (YYYY-MM-DD) or datetime (YYYY-MM-DDTHH:MM:SS), "
@@ -77,11 +39,15 @@ async def instructions(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def handle_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
     date_input = update.message.text.strip()
+    # Cheap structural check first so spam never reaches the datetime parser;
+    # fromisoformat then rejects well-shaped but impossible dates (month 13).
+    if not DATE_RE.fullmatch(date_input):
+        await update.message.reply_text(
+            "Invalid date format. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS"
+        )
+        return
     try:
-        if "T" in date_input:
-            datetime.datetime.fromisoformat(date_input)
-        else:
-            datetime.datetime.strptime(date_input, "%Y-%m-%d")
+        datetime.datetime.fromisoformat(date_input)
     except ValueError:
         await update.message.reply_text(
             "Invalid date format. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS"
@@ -89,20 +55,29 @@ async def handle_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     try:
-        data = fetch_wbgt(date_input)
-        station_data = group_wbgt_by_station(data)
+        data = await fetch_wbgt(date_input)
+        # Grouping is pure-Python CPU over hundreds of records; run it in a
+        # worker thread so the event loop keeps serving other users.
+        station_data, sorted_stations = await asyncio.to_thread(group_wbgt_by_station, data)
 
         if not station_data:
             await update.message.reply_text("No records found.")
             return
 
-        # Save station data for this user
-        context.user_data["station_data"] = station_data
+        # Share the grouped data in bot_data keyed by date: identical queries
+        # from other users reuse it, and the pickle persistence carries it
+        # across restarts so pending keyboards keep working after a deploy.
+        now = time.time()
+        context.bot_data[("wbgt", date_input)] = (now, station_data)
+        for key in list(context.bot_data):
+            if isinstance(key, tuple) and key[0] == "wbgt" and now - context.bot_data[key][0] > _STATE_TTL:
+                del context.bot_data[key]
+        context.user_data["wbgt_date"] = date_input
 
         # Build inline keyboard (1 button per station)
         keyboard = [
             [InlineKeyboardButton(station, callback_data=station)]
-            for station in sorted(station_data.keys())
+            for station in sorted_stations
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
 
@@ -116,7 +91,8 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     station = query.data
-    station_data = context.user_data.get("station_data", {})
+    date_input = context.user_data.get("wbgt_date")
+    _, station_data = context.bot_data.get(("wbgt", date_input), (0, {}))
 
     if station in station_data:
         text = format_station_data(station, station_data[station])
@@ -124,24 +100,41 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         await query.message.reply_text("Station data not found. Please send the date again.")
 
-# --- Minimal Flask server in background thread ---
-def run_flask():
-    flask_app = Flask("WBGT Telegram Bot")
-
-    @flask_app.route("/")
-    def home():
-        return "WBGT Telegram Bot is running!"
+# --- Main function ---
+def main():
+    # Separate pools so long-polling getUpdates can't starve outbound sends
+    # ("All connections in the connection pool are occupied") under burst load.
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .request(HTTPXRequest(connection_pool_size=32, pool_timeout=10.0))
+        .get_updates_request(HTTPXRequest(connection_pool_size=4, pool_timeout=10.0))
+        .persistence(PicklePersistence(filepath="bot_state.pkl"))
+        .post_shutdown(close_http)
+        .build()
+    )
+    app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("instructions", instructions))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_date))
+    app.add_handler(CallbackQueryHandler(button_handler))
 
     port = int(os.environ.get("PORT", 10000))
-    flask_app.run(host="0.0.0.0", port=port)
-
-threading.Thread(target=run_flask, daemon=True).start()
-
-# --- Run Telegram bot in main thread ---
-app = ApplicationBuilder().token(BOT_TOKEN).build()
-app.add_handler(CommandHandler("start", start))
-app.add_handler(CommandHandler("instructions", instructions))
-app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_date))
-app.add_handler(CallbackQueryHandler(button_handler))
-print("Telegram bot with station selection is running...")
-app.run_polling()
\ No newline at end of file
+    public_host = os.environ.get("PUBLIC_HOST") or os.environ.get("RENDER_EXTERNAL_HOSTNAME")
+    if public_host:
+        # Webhook mode: Telegram POSTs only when an update arrives, so no
+        # idle getUpdates long poll, and the webhook listener doubles as the
+        # platform health endpoint -- no separate HTTP server needed.
+        print("Telegram bot with station selection is running (webhook)...")
+        app.run_webhook(
+            listen="0.0.0.0",
+            port=port,
+            url_path=BOT_TOKEN,
+            webhook_url=f"https://{public_host}/{BOT_TOKEN}",
+        )
+    else:
+        # No public hostname (e.g. running locally): fall back to polling.
+        print("Telegram bot with station selection is running (polling)...")
+        app.run_polling()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Shared WBGT fetching and formatting used by the bot entrypoints."""
+import asyncio
+import datetime
+import re
+import time
+from bisect import insort
+from collections import defaultdict
+from functools import lru_cache
+
+import httpx
+import orjson
+
+# Structural shape of an acceptable date / datetime input. Matching this
+# first deflects random text far more cheaply than datetime parsing.
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}:\d{2})?")
+
+# One shared async client so keep-alive reuses the TLS connection to
+# data.gov.sg and concurrent users' fetches overlap on the event loop.
+_HTTP = httpx.AsyncClient(
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+)
+
+# Cache fetched payloads per date string. Today's date keeps updating so it
+# gets a short TTL; historical dates are effectively immutable.
+_CACHE_MAX = 64
+_CACHE_TTL_TODAY = 60
+_CACHE_TTL_PAST = 24 * 3600
+_CACHE = {}
+_CACHE_LOCK = asyncio.Lock()
+
+def _cache_ttl(date_input):
+    if date_input[:10] == datetime.date.today().isoformat():
+        return _CACHE_TTL_TODAY
+    return _CACHE_TTL_PAST
+
+async def _do_fetch(date_input):
+    url = "https://api-open.data.gov.sg/v2/real-time/api/weather"
+    params = {"api": "wbgt", "date": date_input}
+    response = await _HTTP.get(url, params=params)
+    response.raise_for_status()
+    # orjson is a few times faster than the stdlib parser on the ~100 KB
+    # full-day payloads, and this parse runs on the event loop.
+    return orjson.loads(response.content)
+
+async def fetch_wbgt(date_input):
+    now = time.monotonic()
+    async with _CACHE_LOCK:
+        hit = _CACHE.get(date_input)
+    if hit and hit[0] > now:
+        return hit[1]
+    try:
+        data = await _do_fetch(date_input)
+    except Exception:
+        # Stale fallback: an old payload beats an error message.
+        if hit:
+            return hit[1]
+        raise
+    async with _CACHE_LOCK:
+        if len(_CACHE) >= _CACHE_MAX:
+            del _CACHE[min(_CACHE, key=lambda k: _CACHE[k][0])]
+        _CACHE[date_input] = (now + _cache_ttl(date_input), data)
+    return data
+
+async def close_http(app):
+    """post_shutdown hook: close the shared HTTP client."""
+    await _HTTP.aclose()
+
+def group_wbgt_by_station(data):
+    """Return (station_data, sorted_stations): a dict of
+    {station_name: [(datetime, wbgt, heat_stress), ...]} plus the station
+    names in sorted order, collected during grouping so callers never have
+    to sort the keys again."""
+    # Required keys are indexed directly: a payload without them is malformed
+    # and should surface as an error, not silently format nothing.
+    records = data["data"]["records"]
+    station_data = defaultdict(list)
+    sorted_stations = []
+    for record in records:
+        dt = record["datetime"]
+        for rd in record["item"]["readings"]:
+            station = rd["station"]
+            town = station.get("townCenter") or station.get("name") or station.get("id")
+            readings = station_data[town]
+            if not readings:
+                insort(sorted_stations, town)
+            wbgt = rd.get("wbgt")
+            heat_stress = rd.get("heatStress")
+            # Insert in timestamp order as we go; tuples compare on dt first
+            # and lexical order of the fixed-width ISO timestamps is
+            # chronological, so no separate sort pass is needed.
+            insort(readings, (dt, wbgt, heat_stress))
+    return station_data, sorted_stations
+
+# The same ~48 timestamps repeat across every station in a response, so
+# memoizing the parse removes nearly all repeat fromisoformat calls.
+@lru_cache(maxsize=1024)
+def _parse_iso(dt_str):
+    return datetime.datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+
+def format_station_data(station, readings):
+    lines = [f"Station: {station}"]
+    for dt_str, wbgt, heat_stress in readings:
+        # Parse the datetime string
+        dt = _parse_iso(dt_str)
+
+        # Format date and time
+        date_str = dt.strftime("%d %b %Y")   # e.g. 20 Sep 2025
+        time_str = dt.strftime("%H%M")       # e.g. 1215
+
+        # Add to output
+        lines.append(f" Date: {date_str} Time: {time_str}  WBGT: {wbgt}  HeatStress: {heat_stress}")
+
+    return "\n".join(lines)
+
+def format_wbgt_by_station_split(data):
+    station_data, sorted_stations = group_wbgt_by_station(data)
+    if not station_data:
+        return ["No records found."]
+    messages = []
+    for station in sorted_stations:
+        readings = station_data[station]
+        # Preallocate: the line count is known, so skip list-growth
+        # reallocations and repeated appends on large payloads.
+        lines = [None] * (len(readings) + 1)
+        lines[0] = "Station: %s" % station
+        for i, (dt, wbgt, heat_stress) in enumerate(readings, 1):
+            lines[i] = "  %s  WBGT: %s  HeatStress: %s" % (dt, wbgt, heat_stress)
+        messages.append("\n".join(lines))
+    return messages
+
+def pack_messages(messages, limit=4000):
+    """Greedily join messages with blank lines into chunks under Telegram's
+    4096-char limit, so one reply covers several stations."""
+    packed = []
+    current = ""
+    for msg in messages:
+        if not current:
+            current = msg
+        elif len(current) + 2 + len(msg) <= limit:
+            current = current + "\n\n" + msg
+        else:
+            packed.append(current)
+            current = msg
+    if current:
+        packed.append(current)
+    return packed